@@ -0,0 +1,14 @@
+from midgy.language.python import Python
+from midgy.loader import Markdown
+
+
+def test_loaders_share_renderers():
+    # a loader is made for every import so the configured renderers are shared
+    assert Markdown().renderer is Markdown().renderer
+    assert Markdown(include_doctest=True).renderer is not Markdown().renderer
+
+
+def test_loader_doctest_option():
+    assert isinstance(Markdown().renderer, Python)
+    assert Markdown(include_doctest=True).renderer.doctest_code_blocks
+    assert not Markdown().renderer.doctest_code_blocks
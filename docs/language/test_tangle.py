@@ -0,0 +1,31 @@
+from pytest import mark
+
+from midgy.language.python import Python
+from midgy.tangle import Markdown
+
+COMMENTED = [
+    ("a\n\n\nb\n", "a\n\n\nb\n"),
+    ("\n\na\n", "\n\na\n"),
+    ("a\n\n\nb\n\n    x = 1\n", "a\n\n\nb\n\nx = 1\n"),
+]
+
+
+@mark.parametrize("source,expected", COMMENTED)
+def test_noncode_blank_lines(source, expected):
+    # blank lines around noncode blocks are kept so the output matches the source line for line
+    assert Markdown(noncode_blocks=False).render(source) == expected
+
+
+@mark.parametrize("source", ["x\n\n```python\n", "```python\n", "```json\n", "x\n\n```json\n"])
+@mark.parametrize("noncode_blocks", [True, False])
+def test_unclosed_fence_lines(source, noncode_blocks):
+    # fences that run to the end of the document keep the code line for line
+    rendered = Python(noncode_blocks=noncode_blocks).render(source)
+    assert rendered.count("\n") == source.count("\n")
+
+
+def test_fenced_code_blocks_kept_as_given():
+    # the fenced languages are read into a private set, the field is the list that was given
+    tangle = Python(fenced_code_blocks=["js", "python"])
+    assert tangle.fenced_code_blocks == ["js", "python"]
+    assert tangle.render("```js\nx = 1\n```\n") == "# ```js\nx = 1\n# ```\n"
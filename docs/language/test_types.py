@@ -0,0 +1,28 @@
+from midgy.types import Markdown
+
+DOCUMENT = """---
+title: a document
+---
+
+# heading
+
+some text[^note]
+
+[^note]: a footnote
+
+term
+: a definition
+
+```python
+x = 1
+```
+"""
+
+
+def test_markdown_html_uses_the_configured_parser():
+    # outside of ipython the html is rendered by the shared parser that the tangles configure
+    html = Markdown(DOCUMENT).to_html()
+    assert "<hr" not in html and "title: a document" not in html
+    assert 'class="footnote-ref"' in html
+    assert "<dl>" in html and "<dd>a definition</dd>" in html
+    assert 'class="highlight"' in html
@@ -0,0 +1,34 @@
+from types import SimpleNamespace
+
+import IPython
+import IPython.display
+
+from midgy import weave_ipython
+from midgy.language.python import Python
+from midgy.weave import weave
+
+
+def test_weave_argv(monkeypatch):
+    # the arguments are parsed from argv and anything unknown is handed on as extra
+    calls = []
+    monkeypatch.setattr(weave_ipython, "weave", lambda **kwargs: calls.append(kwargs))
+    weave_ipython.weave_argv(["--lang", "python", "--unknown"])
+    (kwargs,) = calls
+    assert kwargs["language"] == "python"
+    assert kwargs["extra"] == ["--unknown"]
+
+
+def test_weave_shell_env_is_not_cached(monkeypatch):
+    # a reference defined in an earlier cell makes a link of a later cell
+    tangle = Python()
+    env = {}
+    tangle.parse("[a]: https://example.com\n", env)
+    shell = SimpleNamespace(tangle=SimpleNamespace(parser=tangle), _markdown_env=env)
+    shell.has_trait, shell.environment = lambda name: False, None
+    shown = []
+    monkeypatch.setattr(IPython, "get_ipython", lambda: shell)
+    monkeypatch.setattr(IPython.display, "display", lambda data, raw: shown.append(data))
+
+    assert tangle.render("[a]\n") == '("""[a]""");\n'
+    weave("[a]\n", run=False, weave=False)
+    assert "iframes" in shown[-1]["text/x-python"]
@@ -16,19 +16,19 @@ run.add_argument(
 convert = sub.add_parser("convert")
 
 subs = {"run", "convert"}
-try:
-    # set up rich
-    from rich import print
-    from rich.traceback import install
-
-    install(suppress=[])
-except ModuleNotFoundError:
-    pass
 
 
 def main(parser=parser):
     from sys import argv
 
+    try:
+        # set up rich when the command runs, importing this module has no side effects
+        from rich.traceback import install
+
+        install(suppress=[])
+    except ModuleNotFoundError:
+        pass
+
     Markdown.load_argv(argv[1:])
 
 
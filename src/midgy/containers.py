@@ -1,15 +1,18 @@
 """renderers for lists and definition lists in python"""
 
 from dataclasses import dataclass
-import midgy, markdown_it, re
+from re import compile
+import midgy, markdown_it
 from .language.python import Python
 
+LIST_MARKERS = compile(r"^(\s{,3}([\-\+\*\:]|[0-9]+[.\)]?)\s{,4})*").sub
+
 
 @dataclass
 class Lists(Python):
     def escape(self, body):
         """escape"""
-        body = re.compile("^(\s{,3}([\-\+\*\:]|[0-9]+[.\)]?)\s{,4})*").sub("", body)
+        body = LIST_MARKERS("", body)
         return super().escape(body)
 
     # the hyphen is a default choice for lists because they appear isomorphic to yaml lists
@@ -32,7 +35,7 @@ class Lists(Python):
         ) is parent:
             yield "+"
         else:
-            yield " " * self.get_indent(env)
+            yield self.get_indent_prefix(env)
 
     def bullet_list_close(self, token, env):
         if token.markup not in self.list_items:
@@ -114,7 +117,7 @@ class Lists(Python):
                 tokens.insert(pos + 2, code)
             return self.postlex(tokens, env)
 
-        super().postlex(tokens, env)
+        return super().postlex(tokens, env)
 
 
 @dataclass
@@ -132,7 +135,7 @@ class Defs(Python):
         #     yield "|"
         # else:
         if prior:
-            yield " " * self.get_indent(env)
+            yield self.get_indent_prefix(env)
 
     def dl_close(self, token, env):
         env["comment"] = bool(token.meta["open"].meta.get("parent"))
@@ -241,7 +244,7 @@ class Defs(Python):
                 code = tokens.pop(pos)
                 tokens.insert(pos + 2, code)
             return self.postlex(tokens, env)
-        super().postlex(tokens, env)
+        return super().postlex(tokens, env)
 
 
 class Containers(Defs, Lists):
@@ -254,10 +257,10 @@ class Containers(Defs, Lists):
                 pos = len(tokens) - swap
                 code = tokens.pop(pos)
                 tokens.insert(pos + 2, code)
-            self.postlex(tokens, env)
+            return self.postlex(tokens, env)
 
         else:
-            super().postlex(tokens, env)
+            return super().postlex(tokens, env)
 
 
 def postlex(self, tokens, env):
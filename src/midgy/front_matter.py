@@ -1,11 +1,14 @@
 from enum import Enum
+from functools import lru_cache
 from re import compile
 
 __all__ = ("load",)
-SHEBANG = compile("^#!\s*(?P<interpreter>\S+)\s*(?P<command>.*)")
+SHEBANG = compile(r"^#!\s*(?P<interpreter>\S+)\s*(?P<command>.*)").match
 
 
 FM = Enum("FM", {"-": "yaml", "+": "toml"})
+# the character codes of the front matter delimiters following their first character
+FM_CHARS = {x: (ord(x),) * 2 for x in "-+"}
 
 
 def get_ini(data):
@@ -18,7 +21,8 @@ def get_ini(data):
 
 def strip_and_classifiy(x):
     x = x.strip()
-    return FM(x[0]), "".join(x.splitlines(True)[1:-1])
+    # the body between the delimiter lines is sliced out rather than split into lines and joined
+    return FM(x[0]), x[x.find("\n") + 1 : x.rfind("\n") + 1]
 
 
 def get_loader(markup):
@@ -37,7 +41,11 @@ def load(x):
 
 
 def load_toml(x):
-    from tomli import loads
+    try:
+        from tomllib import loads
+    except ModuleNotFoundError:
+        # tomllib is in the standard library from python 3.11, tomli is its backport
+        from tomli import loads
 
     return loads(x)
 
@@ -46,10 +54,10 @@ def load_yaml(x):
     return _get_yaml_loader()(x)
 
 
+@lru_cache(1)
 def _get_yaml_loader():
-    loader = getattr(_get_yaml_loader, "loader", None)
-    if loader:
-        return loader
+    """find the yaml loader once, it is resolved lazily so documents without front matter
+    never import a yaml library."""
     try:
         from ruamel.yaml import safe_load as load
     except ModuleNotFoundError:
@@ -57,7 +65,6 @@ def _get_yaml_loader():
             from yaml import safe_load as load
         except ModuleNotFoundError:
             from json import loads as load
-    _get_yaml_loader.loader = load
     return load
 
 
@@ -71,7 +78,7 @@ def _shebang_lexer(state, startLine, endLine, silent):
     if state.tokens:
         return False
 
-    m = SHEBANG.match(state.src[start:maximum])
+    m = SHEBANG(state.src[start:maximum])
     if not m:
         return False
 
@@ -125,30 +132,34 @@ def _front_matter_lexer(state, startLine, endLine, silent):
     else:
         return False
 
-    if state.srcCharCode[start + 1 : maximum] != tuple(map(ord, (markup, markup))):
+    chars = FM_CHARS[markup]
+    if state.srcCharCode[start + 1 : maximum] != chars:
         return False
 
     # Search for the end of the block
     nextLine = startLine
+    # the line arrays are bound once rather than looked up on the state for every line
+    bMarks, tShift, eMarks, sCount = state.bMarks, state.tShift, state.eMarks, state.sCount
+    src, blkIndent = state.srcCharCode, state.blkIndent
 
     while True:
         nextLine += 1
         if nextLine >= endLine:
             return False
 
-        start = state.bMarks[nextLine] + state.tShift[nextLine]
-        maximum = state.eMarks[nextLine]
+        start = bMarks[nextLine] + tShift[nextLine]
+        maximum = eMarks[nextLine]
 
-        if start < maximum and state.sCount[nextLine] < state.blkIndent:
+        if start < maximum and sCount[nextLine] < blkIndent:
             break
 
-        if ord(markup) != state.srcCharCode[start]:
+        if chars[0] != src[start]:
             continue
 
-        if state.sCount[nextLine] - state.blkIndent >= 4:
+        if sCount[nextLine] - blkIndent >= 4:
             continue
 
-        if state.srcCharCode[start + 1 : maximum] == tuple(map(ord, (markup, markup))):
+        if src[start + 1 : maximum] == chars:
             auto_closed = True
             nextLine += 1
             break
@@ -3,19 +3,29 @@
 
 from collections import deque
 from dataclasses import dataclass, field
-from functools import wraps
+from functools import lru_cache, wraps
 from importlib.metadata import EntryPoint
 from io import StringIO
-from itertools import pairwise, zip_longest
-from re import sub
+from itertools import chain, islice, pairwise
+from re import compile
 from subprocess import check_output
-from textwrap import dedent
-from ..tangle import Markdown, SP
 
+from markdown_it.token import Token
+
+from ..tangle import BLOCK, FENCE, Markdown, SP, get_info_lang, get_lines, join_dedent_block
+
+CELL_MAGIC = compile(r"\s*%%").match
+WHITESPACE_LINE = compile(r"(?m)^[ \t]+$").sub
+CODE_TYPES = {BLOCK, FENCE}
+PARAGRAPH = {"paragraph_open", "inline", "paragraph_close"}
+# the env state read while rendering noncode blocks
+ENV_KEYS = "comment continued hanging indent indent_prefix indented next_code quoted".split()
 LOAD_FENCE = """__import__("importlib").metadata.EntryPoint(None, "{}", None).load()"""
 
 
-@dataclass
+# slots make the fields read for every token faster to access.
+# slotted dataclasses are rebuilt as new classes so `super` needs explicit arguments.
+@dataclass(slots=True)
 class Python(Markdown, type="text/x-python", language="ipython3"):
     """transform markdown to python code
 
@@ -31,7 +41,6 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
     CONTINUE_MARKER = "\\"
     TERMINAL_MARKER = ";"
     YAML = "yaml"  # yaml library we use, users may have different preferences.
-    TOML = "tomli"  # toml library we use, users may have different preferences.
 
     # these entry point style references map to functiosn that code load string syntaxes
     fence_methods = dict(
@@ -41,7 +50,8 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
         json5="json5:loads",
         yaml=f"{YAML}:safe_load",
         yml=f"{YAML}:safe_load",
-        toml=f"{TOML}:loads",
+        # toml is loaded with tomllib or its tomli backport, the same as toml front matter
+        toml="midgy.front_matter:load_toml",
         front_matter="midgy.front_matter:load",
         css="midgy.types:Css",
         html="midgy.types:HTML",
@@ -76,14 +86,14 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
         elif self.indented_code_blocks:
             # yield formatted non-code as string or comment
             yield from self.noncode_block(env, token)
-            block = self.generate_block_lines(env, token.map[1])
+            block = self.take_lines(env, token.map[1])
             if self.include_magic and token.meta.get("is_magic"):
                 # yield code formatted python code that invokes a ipython magic
-                yield from self.cell_magic(token, block, env)
-                self.update_env(token, env, last_indent=env.get("last_indent"))
+                yield from self.cell_magic(token, iter(block), env)
+                self.update_env(token, env, last_indent=env["last_indent"])
             else:
                 # the default dedents the code block to align code blocks
-                yield from self.generate_dedent_block(block, env["min_indent"])
+                yield join_dedent_block(block, env["min_indent"])
                 self.update_env(token, env)
 
     def code_doctest(self, token, env):
@@ -91,16 +101,19 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
 
         the input is included in the program and the output is commented out."""
 
-        block = self.generate_block_lines(env, token.meta["input"][1])
+        block = self.take_lines(env, token.meta["input"][1])
+        indent = self.get_indent_prefix(env)
 
         # normalize the input statement by dedenting & removing the 4 prefixes chars ">>> ", "... "
-        block = self.generate_dedent_block(block, token.meta["min_indent"] + 4)
-        indent = SP * self.get_indent(env)
-
-        # indent the input block to align with the implicit indent
-        yield from map(indent.__add__, block)
+        # then indent the input block to align with the implicit indent
+        dedent = token.meta["min_indent"] + 4
+        if indent:
+            yield "".join([indent + (x[dedent:] if len(x) > 1 else x) for x in block])
+        else:
+            # most doctests are not nested in an indent so the prompts are sliced off and joined
+            yield join_dedent_block(block, dedent)
         if token.meta["output"]:
-            block = self.generate_block_lines(env, token.meta["output"][1])
+            block = self.take_lines(env, token.meta["output"][1])
             block = self.generate_dedent_block(block, token.meta["min_indent"])
             # export the output blocks as comments so they do no interact with the program
             yield from map(indent.__add__, self.generate_comment(block, token, env))
@@ -118,27 +131,30 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
             args = ()
 
         min_indent = token and token.meta.get("min_indent") or 0
-        yield SP * self.get_indent(env)
-
-        # write the first line of the cell magic, the same transform IPython makes
-        yield f"""get_ipython().run_cell_magic("{prog}", "{args and args[0] or ''}", """
-
-        # we might have to worry about line continuations, that is not considered yet.
-        # comment out the original line so we retain the undisturbed source
-        yield f"# {first}"
+        indent = self.get_indent_prefix(env)
 
         # write the cell body as a block string stripping the right most whitespace
-        cell = "".join(self.generate_dedent_block(block, min_indent))
+        cell = join_dedent_block(block, min_indent)
         left = cell.rstrip()
-
-        # triple block quotes around cell
-        yield from (self.STRING_MARKER[0], self.escape(left), self.STRING_MARKER[0])
-        # close the magic method caller and write the trailing whitespace
-        yield from (")", cell[len(left) :])
+        quote = self.STRING_MARKER[0]
+
+        # the magic invocation is written at once:
+        # * the first line of the cell magic, the same transform IPython makes
+        # * the original line commented out so we retain the undisturbed source.
+        #   we might have to worry about line continuations, that is not considered yet.
+        # * the escaped cell body in triple block quotes
+        # * the close of the magic method caller and the trailing whitespace
+        yield (
+            f"""{indent}get_ipython().run_cell_magic("{prog}", "{args and args[0] or ''}", """
+            f"# {first}{quote}{self.escape(left)}{quote}){cell[len(left):]}"
+        )
 
     @staticmethod
     def escape(str):
-        return str.replace("\\", r"\\").replace('"', r"\"")
+        # most prose has nothing to escape so it skips both replacements
+        if "\\" in str or '"' in str:
+            return str.replace("\\", r"\\").replace('"', r"\"")
+        return str
 
     def eval(self, tangled):
         from .._ipython import run_ipython
@@ -157,7 +173,7 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
                 lang = self.get_lang(token)
                 # format the prior non-code
                 yield from self.noncode_block(env, token)
-                if lang in self.fenced_code_blocks:
+                if lang in self._fenced_languages:
                     # render fence as python code
                     yield from self.fence_code(token, env)
                 else:
@@ -170,21 +186,21 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
     def fence_code(self, token, env):
         """render code fence as python code"""
 
+        first, block, last = self.get_fence_lines(token, env)
         # comment out the first line of the fence dashes
         yield self.COMMENT_MARKER
-        yield from self.generate_block_lines(env, token.map[0] + 1)
+        yield from first
 
-        block = self.generate_block_lines(env, token.map[1] - 1)
         if self.include_magic and token.meta.get("is_magic"):
             # render the fence content as a cell magic invocation
-            yield from self.cell_magic(token, block, env)
+            yield from self.cell_magic(token, iter(block), env)
         else:
             # dedent the code like we would an indent code block
-            yield from self.generate_dedent_block(block, env["min_indent"])
+            yield join_dedent_block(block, env["min_indent"])
 
         # comment out the last of fence dashes
         yield self.COMMENT_MARKER
-        yield from self.generate_block_lines(env, token.map[1])
+        yield from last
         self.update_env(token, env, quoted=False, continued=False)
         # we don't allow for continued blocks or explicit quotes with code fences.
         # these affordances are only possible with indented code blocks.
@@ -197,7 +213,7 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
 
     def fence_noncode(self, token, env):
         """render a fence as a block string with an optional caller method"""
-        yield SP * self.get_indent(env)
+        yield self.get_indent_prefix(env)
 
         # fence method are functions applied to block string in a fence like json, toml, tomli
         method = self.get_fence_method(token)
@@ -207,14 +223,13 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
 
         # parenthesis are used to group strings together and allow for methods to called on the block string.
         # group and comment out the first line of the fence dashes
+        first, block, rest = self.get_fence_lines(token, env)
         yield "( # "
-        yield from self.generate_block_lines(env, token.map[0] + 1)
+        yield from first
 
         # quote and escape the string block
         yield self.STRING_MARKER[0]
-        block = self.generate_block_lines(env, token.map[1] - 1)
-        block = self.generate_dedent_block(block, token.meta.get("min_indent"))
-        yield from map(self.escape, block)
+        yield from self.generate_escaped_block(block, token.meta.get("min_indent"))
         yield self.STRING_MARKER[1]
 
         # close the fence group and comment out the last fence dashes
@@ -224,9 +239,8 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
         if method:
             yield ")"
         yield " # "
-        rest = self.generate_block_lines(env, token.map[1])
-        if token.meta["next_code"] is None:
-            last = next(rest)
+        if rest and token.meta["next_code"] is None:
+            last = rest[0]
             yield last[:-1]
             if not method:
                 # show anything with a method directly
@@ -237,9 +251,20 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
         else:
             yield from rest
 
+    def generate_escaped_block(self, block, dedent):
+        """dedent and escape the lines of a block string in a single pass"""
+        escape = self.escape
+        if escape is Python.escape:
+            # the python escape doesn't depend on the line so the block is escaped at once
+            # and skipped entirely when it has nothing to escape.
+            yield escape(join_dedent_block(block, dedent))
+            return
+        for line in block:
+            yield escape(line[dedent:] if len(line) > 1 else line)
+
     def front_matter(self, token, env):
         """render front matter as python code with an optional variable name"""
-        yield from self.generate_block_lines(env, token.map[0])
+        yield from self.take_lines(env, token.map[0])
         if self.front_matter_variable:
             # the front matter variable is the name assign the parsed front matter.
             # we choose the default name because of its conventions in static site generators
@@ -251,77 +276,115 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
         yield from self.fence_noncode(token, env)
 
     def display_iframes(self, tokens, env, target):
-        print(
-            f"""__import__("importlib").import_module("midgy._ipython").iframes('''""",
-            sep="",
-            end="",
-            file=target,
+        target.write(
+            f"""__import__("importlib").import_module("midgy._ipython").iframes('''"""
+            + "".join(self.take_lines(env))
+            + """''');"""
         )
-        for line in self.generate_block_lines(env):
-            print(line, sep="", end="", file=target)
-        print("""''');""", sep="", end="", file=target)
 
     def parse(self, source, env=None):
-
-        tokens = super().parse(source, env)
-        if env is None:
-            env = self.initialize_env(source, tokens)
-        self.postlex(tokens, env)
-        return tokens
+        return self.parse_measured(source, env)[0]
+
+    def parse_measured(self, source, env=None):
+        """parse a source and measure the least indent of its code blocks.
+
+        the measure is returned rather than stored in the env, the env can belong to
+        the caller like the markdown env of a shell."""
+        # the render env is created once when the tokens are rendered,
+        # postlex only links tokens so it doesn't need one of its own.
+        env = {} if env is None else env
+        tokens = self.parse_blocks(source, env)
+        if self.link_iframes and all(token.type in PARAGRAPH for token in tokens):
+            # only a document of paragraphs can be a block of urls.
+            # the inline tokens are only needed to tell, the rest of the rendering uses the lines.
+            self.parse_inline(tokens, env)
+        return tokens, self.postlex(tokens, env)
 
     def postlex(self, tokens, env):
-        code = None
-        for token in tokens[::-1]:
+        code, min_indent = None, None
+        for token in reversed(tokens):
             token.meta["next_code"] = code
             if self.is_code_block(token):
                 code = token
+                # measure the least indent of the code while the code blocks are visited
+                if not token.meta.get("is_magic"):
+                    indent = token.meta["min_indent"]
+                    if min_indent is None or indent < min_indent:
+                        min_indent = indent
+        return min_indent
 
     def generate_tokens(self, tokens, env=None, src=None, stop=None, target=None):
         """generate lines of python code transformed from mardown."""
-        right = src.lstrip()
-        if right.startswith(("%%",)):
-            for part in self.cell_magic(None, StringIO(right), env):
-                print(part, sep="", end="", file=target)
+        # only the prefix of the source is scanned to find a cell magic
+        if CELL_MAGIC(src):
+            target.writelines(self.cell_magic(None, StringIO(src.lstrip()), env))
             return
 
         if self.link_iframes and is_urls(tokens):
             self.display_iframes(tokens, env, target)
             return
 
-        # work backwards through the tokens to associated code blocks and non-code blocks
-
-        # work forward through the tokens to render the python code
-        for token, next in zip_longest(tokens, tokens[1:]):
+        # the tokens were linked to their next code block when they were parsed.
+        # work forward through the tokens to render the python code with a lookahead.
+        # the rendered parts are written straight to the target, a StringIO accumulates
+        # them itself so the output is only copied when its value is read.
+        write = target.writelines
+        for token, next in zip(tokens, chain(islice(tokens, 1, None), (None,))):
             env["next"] = next
             if self.is_code_block(token):
                 env["next_code"] = token
-            for line in self.render_token(token, env):
-                print(line, file=target, sep="", end="")
+                env["indent"] = env["indent_prefix"] = None
+            method = self.get_token_method(token.type)
+            if method:
+                write(method(self, token, env) or ())
             env["last"] = token
 
         # handle still in the buffer as a non code block
-        for line in self.noncode_block(env, stop):
-            print(line, file=target, sep="", end="")
+        write(self.noncode_block(env, stop))
 
     def get_fence_method(self, token):
         """map the code fence info to python method"""
         lang = self.get_lang(token)
-        method = self.fence_methods.get(lang, lang)
-        if ":" in method:
-            return LOAD_FENCE.format(method)
-        return ""
+        return get_fence_loader(self.fence_methods.get(lang, lang))
+
+    def get_fence_lines(self, token, env):
+        """read the lines of a fence at once and split them into the opening, body, and closing"""
+        start = env["last_line"]
+        lines = self.take_lines(env, token.map[1])
+        head, tail = max(token.map[0] + 1 - start, 0), max(token.map[1] - 1 - start, 0)
+        # unclosed or empty fences at the end of a document span fewer than two lines
+        tail = max(tail, head)
+        return lines[:head], lines[head:tail], lines[tail:]
 
     def get_indent(self, env):
+        """get the indent for non-code blocks.
+
+        the indent only changes when a code block updates the env so it is computed once until then.
+        """
+        indent = env["indent"]
+        if indent is None:
+            indent = env["indent"] = self.get_computed_indent(env)
+        return indent
+
+    def get_indent_prefix(self, env):
+        """get the whitespace that indents non-code blocks, it is built once like the indent"""
+        prefix = env["indent_prefix"]
+        if prefix is None:
+            prefix = env["indent_prefix"] = SP * self.get_indent(env)
+        return prefix
+
+    def get_computed_indent(self, env):
         """compute the indent for non-code blocks based on bounding code block conditions."""
 
         # the default indent is the dendet of the last line of a preceeding code block
         # or the minimum indent of the entire block
-        indent = max(env.get("last_indent", env.get("min_indent")), env.get("min_indent"))
-        if env.get("indented"):
+        min_indent = env["min_indent"]
+        indent = max(env["last_indent"], min_indent)
+        if env["indented"]:
             # indent blocks from a colon from an if, def, or class statement.
             # this computation makes it possible to use markdown as docstrings
             # or trigger condition magics that weren't possible otherwise.
-            next_code = env.get("next_code")
+            next_code = env["next_code"]
             if next_code:
                 # if there is a following code block
                 next_indent = next_code.meta["first_indent"]
@@ -333,16 +396,32 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
                     indent += 4
             else:
                 indent += 4
-        return indent - env.get("min_indent")
+        return indent - min_indent
 
     def get_lang(self, token):
         """transform the fence info to the language it represents"""
-        lang = token.info.split(maxsplit=1)
-        return lang and lang[0] or ""
+        return get_info_lang(token.info)
+
+    def get_render_key(self):
+        """the fence methods are shared with the shell and may change between renderings"""
+        return super(Python, self).get_render_key() + tuple(self.fence_methods.items())
+
+    def initialize_env(self, src, tokens, min_indent=None):
+        """initialize the parser environment with every key the noncode blocks read.
+
+        the keys are seeded once so the noncode hot paths index the env rather than
+        calling env.get with a default for every block."""
+        env = super(Python, self).initialize_env(src, tokens, min_indent)
+        for key in ENV_KEYS:
+            env.setdefault(key, None)
+        return env
 
     def is_code_block(self, token):
         """is the token a code block entry"""
-        is_code = super().is_code_block(token)
+        if token.type not in CODE_TYPES:
+            # most tokens are prose, only indented code and fences can be code
+            return False
+        is_code = super(Python, self).is_code_block(token)
         if not is_code:
             if token.meta.get("is_doctest"):
                 return self.doctest_code_blocks
@@ -351,12 +430,10 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
 
     def noncode_block(self, env, next=None, comment=False, **kwargs):
         """dispatch comments of bock strings for noncode blocks"""
-        from markdown_it.token import Token
-
         if isinstance(next, Token):
             next = next.map[0]
-        block = self.generate_block_lines(env, next)
-        if comment or env.get("comment") or not self.noncode_blocks:
+        block = self.take_lines(env, next)
+        if comment or env["comment"] or not self.noncode_blocks:
             yield from self.generate_comment(block, None, env, **kwargs)
         else:
             yield from self.noncode_string(block, next, env, **kwargs)
@@ -364,14 +441,16 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
     def generate_comment(self, block, token, env, *, prepend="", **kwargs):
         if self.comment_prefix_line:
             yield from self.noncode_whitespace(env)
-            pre = SP * self.generate_env_indent(env, token) + self.COMMENT_MARKER
+            # the line prefix is built once for the block
+            marker = self.COMMENT_MARKER + " "
             for line in block:
                 if line.strip():
-                    yield from self.noncode_whitespace(env)
-                    yield self.COMMENT_MARKER + " "
+                    if env["whitespace"]:
+                        yield from self.noncode_whitespace(env)
+                    yield marker
                     yield line
                 else:
-                    env["whitespace"].write(line)
+                    env["whitespace"].append(line)
             yield from self.noncode_whitespace(env)
         else:
             self.generate_wrapped_lines(
@@ -390,65 +469,61 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
         whitespace=True,
     ):
         """generate a block string from a noncode block"""
-        block = "".join(block)
-        if env.get("hanging"):
-            block = StringIO(block)
-            try:
-                block = next(block) + dedent("".join(block))
-            except StopIteration:
-                return
-        else:
-            block = dedent(block)
-        body = block.lstrip()
-        start = len(block) - len(body)
-        body = body.rstrip()
-        end = start + len(body)
-        env["whitespace"].write(block[:start])
+        parts = get_noncode_parts("".join(block), bool(env["hanging"]))
+        if parts is None:
+            return
+        block, body, start, end = parts
+        paren = paren and self.include_quote_parenthesis
+        env["whitespace"].append(block[:start])
+        # the pieces of the block string are collected and yielded as one string
+        out = []
 
         # yield any preceeding whitespace
         body = self.escape(body)
         if body:
-            yield from self.noncode_whitespace(env)
+            out.extend(self.noncode_whitespace(env))
             # noncode blocks that end with a line continuation
             # will continue that line to the next code or non-code block
             env["continued"] = body.endswith("\\")
             if env["continued"]:
                 body = body[:-2]
             # place tight quote before the block string body
-            if not env.get("hanging"):
-                yield SP * self.get_indent(env)
-            yield prepend
-            if not env.get("quoted"):
-                if paren and self.include_quote_parenthesis:
-                    yield "("
-                yield self.STRING_MARKER[0]
-        yield from StringIO(body)
+            if not env["hanging"]:
+                out.append(self.get_indent_prefix(env))
+            out.append(prepend)
+            if not env["quoted"]:
+                out.append("(" + self.STRING_MARKER[0] if paren else self.STRING_MARKER[0])
         if body:
+            # the body is written whole, the target doesn't need it line by line
+            out.append(body)
             # place tight quote after the block string body
-            if not env.get("quoted"):
-                yield self.STRING_MARKER[1]
-                if paren and self.include_quote_parenthesis:
-                    yield ")"
-            yield append
+            if not env["quoted"]:
+                out.append(self.STRING_MARKER[1] + ")" if paren else self.STRING_MARKER[1])
+            out.append(append)
             if next_block is None:
-                yield ";"
-        env["whitespace"].write(block[end:])
+                out.append(";")
+        env["whitespace"].append(block[end:])
         if whitespace:
-            yield from self.noncode_whitespace(env)
+            out.extend(self.noncode_whitespace(env))
+        yield "".join(out)
 
     def noncode_whitespace(self, env):
-        indent = self.get_indent(env)
-        env["whitespace"].seek(0)
-        for line in env["whitespace"]:
-            if line.endswith("\n"):
-                if env.get("continued"):
-                    yield SP * indent
-                    yield "\\"
-                yield "\n"
-        env["whitespace"] = StringIO()
+        # continued lines are padded to the indent, the padding is built once for all the lines
+        newline = self.get_indent_prefix(env) + "\\\n" if env["continued"] else "\n"
+        # only complete lines in the whitespace buffer are written
+        for i in range("".join(env["whitespace"]).count("\n")):
+            yield newline
+        env["whitespace"] = []
+
+    def render(self, src, target=None):
+        if CELL_MAGIC(src):
+            # a cell magic hands its whole body to ipython so the markdown is never parsed
+            return self.render_tokens([], src=src, target=target)
+        return super(Python, self).render(src, target=target)
 
     def render_lines(self, source):
-        return self.render("".join(source)).splitlines(True)
+        # cells are often re-run unchanged, the rendering is shared through the render cache
+        return get_lines(self.render("".join(source)))
 
     def update_env(self, token, env, **kwargs):
         env["quoted"] = token.meta.get("is_quoted")
@@ -456,9 +531,72 @@ class Python(Markdown, type="text/x-python", language="ipython3"):
         env["indented"] = token.meta.get("is_indented")
         env["last_indent"] = token.meta.get("last_indent", env["last_indent"])
         env["next_code"] = token.meta.get("next_code")
+        env["indent"] = env["indent_prefix"] = None
         env.update(kwargs)
 
 
+def dedent_block(block):
+    """remove the common leading whitespace from a block like textwrap.dedent.
+
+    the scan stops as soon as a line without a margin is found, the common case for markdown."""
+    lines, margin = get_lines(block), None
+    for line in lines:
+        body = line.lstrip(" \t")
+        if body and body != "\n":
+            indent = line[: len(line) - len(body)]
+            if margin is None or margin.startswith(indent):
+                margin = indent
+            elif not indent.startswith(margin):
+                for i, (x, y) in enumerate(zip(margin, indent)):
+                    if x != y:
+                        margin = margin[:i]
+                        break
+            if not margin:
+                break
+    if not margin:
+        return WHITESPACE_LINE("", block)
+    size = len(margin)
+    return "".join(
+        line[size:] if line.lstrip(" \t") not in ("", "\n") else line.lstrip(" \t")
+        for line in lines
+    )
+
+
+@lru_cache(256)
+def get_noncode_parts(block, hanging=False):
+    """dedent a noncode block and locate its body between the leading and trailing whitespace.
+
+    cells are re-rendered with the same markdown so the results are memoized."""
+    if hanging:
+        if not block:
+            return None
+        # hanging blocks keep the indent of their first line
+        first, newline, rest = block.partition("\n")
+        block = first + newline + dedent_block(rest)
+    elif not block.strip(" \t\n"):
+        # blank runs between code blocks are common and have no body to quote.
+        # every line is blank so the spaces and tabs are replaced without a regex.
+        block = block.replace(" ", "").replace("\t", "")
+        return block, "", len(block), len(block)
+    else:
+        block = dedent_block(block)
+    body = block.lstrip()
+    start = len(block) - len(body)
+    body = body.rstrip()
+    return block, body, start, start + len(body)
+
+
+@lru_cache(None)
+def get_fence_loader(method):
+    """format an entry point style reference as python code that loads it.
+
+    fence methods are shared with the shell and may change at runtime
+    so we memoize on the reference rather than the language."""
+    if ":" in method:
+        return LOAD_FENCE.format(method)
+    return ""
+
+
 def is_urls(tokens):
     """determine if a string is a block of urls from markdown it tokens."""
 
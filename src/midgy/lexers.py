@@ -4,47 +4,70 @@ BLOCK, FENCE, PYCON = "code_block", "fence", "pycon"
 DOCTEST_CHARS = 62, 62, 62, 32  # >>>S
 ELLIPSIS_CHARS = (ord("."),) * 3 + (32,)
 MAGIC_CHARS = (37, 37)  # %%
-MAGIC = compile("^\s*%{2}\S+")
+# the first characters are compared before slicing to avoid building a tuple for most lines
+DOCTEST_CHAR, ELLIPSIS_CHAR, MAGIC_CHAR = DOCTEST_CHARS[0], ELLIPSIS_CHARS[0], MAGIC_CHARS[0]
+DOCTEST_SPACE = DOCTEST_CHARS[-1]
+MAGIC = compile(r"^\s*%{2}\S+").match
+# a magic after the doctest prompt, matched in place rather than stripping copies of the content
+DOCTEST_MAGIC = compile(r"\s*>*\s*%{2}\S+").match
 
 
 def code_lexer(state, start, end, silent=False):
     """a code lexer that tracks indents in the token and is aware of doctests"""
-    is_magic, min_indent = None, 9999
     if state.sCount[start] - state.blkIndent >= 4:
-        first_indent, last_indent, next, last_line = 0, 0, start, start
-        while next < end:
-            if state.isEmpty(next):
-                next += 1
-                continue
-            if state.sCount[next] - state.blkIndent >= 4:
-                begin = state.bMarks[next] + state.tShift[next]
-                if is_magic is None:
-                    is_magic = state.srcCharCode[begin : begin + 2] == MAGIC_CHARS
-                elif state.srcCharCode[begin : begin + 4] == DOCTEST_CHARS:
-                    break
-                if not first_indent:
-                    first_indent = state.sCount[next]
-                min_indent = min(min_indent, state.sCount[next])
-                last_indent, last_line = state.sCount[next], next
-                next += 1
-            else:
-                break
+        last_line, first_indent, last_indent, min_indent, is_magic = scan_code(
+            state.sCount,
+            state.bMarks,
+            state.tShift,
+            state.eMarks,
+            state.srcCharCode,
+            start,
+            end,
+            state.blkIndent + 4,
+        )
         state.line = last_line + 1
         token = state.push(BLOCK, "code", 0)
         token.content = state.getLines(start, state.line, 4 + state.blkIndent, True)
         token.map = [start, state.line]
-        token.meta.update(
-            first_indent=first_indent,
-            last_indent=last_indent,
-            min_indent=min_indent,
-            is_magic=is_magic,
-            is_doctest=False,
+        # a dict display builds the meta in one step with constant keys
+        token.meta = {
+            "first_indent": first_indent,
+            "last_indent": last_indent,
+            "min_indent": min_indent,
+            "is_magic": is_magic,
+            "is_doctest": False,
             **content_state(token),
-        )
+        }
         return True
     return False
 
 
+def scan_code(sCount, bMarks, tShift, eMarks, chars, start, end, indent):
+    """scan the lines of an indented code block.
+
+    the scan only reads the line arrays of the block state so it avoids attribute and method
+    lookups for every line. it returns the last line of the block and its indent metadata."""
+    is_magic, min_indent, first_indent, last_indent, last_line = None, 9999, 0, 0, start
+    for next in range(start, end):
+        begin = bMarks[next] + tShift[next]
+        if begin >= eMarks[next]:
+            # skip empty lines
+            continue
+        count = sCount[next]
+        if count < indent:
+            break
+        if is_magic is None:
+            is_magic = chars[begin] == MAGIC_CHAR and chars[begin : begin + 2] == MAGIC_CHARS
+        elif chars[begin] == DOCTEST_CHAR and is_doctest(chars, begin, eMarks[next]):
+            break
+        if not first_indent:
+            first_indent = count
+        if count < min_indent:
+            min_indent = count
+        last_indent, last_line = count, next
+    return last_line, first_indent, last_indent, min_indent, is_magic
+
+
 def doctest_lexer(state, startLine, end, silent=False):
     """a markdown-it-py plugin for doctests
 
@@ -63,48 +86,104 @@ def doctest_lexer(state, startLine, end, silent=False):
     if (state.sCount[startLine] - state.blkIndent) < 4:
         return False
 
-    if state.srcCharCode[start : start + 4] == DOCTEST_CHARS:
-        lead, extra, output, closed = startLine, startLine + 1, startLine + 1, False
-        indent, next, magic = state.sCount[startLine], startLine + 1, None
-        while next < end:
-            if state.isEmpty(next):
-                break
-            if state.sCount[next] < indent:
-                break
-            begin = state.bMarks[next] + state.tShift[next]
-            if state.srcCharCode[begin : begin + 4] == DOCTEST_CHARS:
-                break
-            next += 1
-            if (not closed) and state.srcCharCode[begin : begin + 4] == ELLIPSIS_CHARS:
-                extra = next
-            else:
-                closed = True
-                output = next
+    if is_doctest(state.srcCharCode, start, state.eMarks[startLine]):
+        lead, indent = startLine, state.sCount[startLine]
+        next, extra, output = scan_doctest(
+            state.sCount,
+            state.bMarks,
+            state.tShift,
+            state.eMarks,
+            state.srcCharCode,
+            startLine,
+            end,
+        )
         state.line = next
         token = state.push(BLOCK, "code", 0)
-        token.content = state.getLines(startLine, next, 0, True)
+        if state.level:
+            # containers like block quotes move the line marks past their markers
+            token.content = state.getLines(startLine, next, 0, True)
+        else:
+            # outside of containers the untrimmed lines are one contiguous slice of the source
+            token.content = state.src[state.bMarks[startLine] : state.eMarks[next - 1] + 1]
         token.map = [startLine, state.line]
-        token.meta.update(
-            first_indent=indent,
-            last_indent=indent,
-            min_indent=indent,
-            is_magic=bool(MAGIC.match(token.content.lstrip().lstrip(">").lstrip())),
-            is_doctest=True,
-            input=[lead, extra],
-            output=[extra, output] if extra < output else None,
-        )
+        token.meta = {
+            "first_indent": indent,
+            "last_indent": indent,
+            "min_indent": indent,
+            "is_magic": bool(DOCTEST_MAGIC(token.content)),
+            "is_doctest": True,
+            "input": [lead, extra],
+            "output": [extra, output] if extra < output else None,
+        }
         return True
     return False
 
 
+def scan_doctest(sCount, bMarks, tShift, eMarks, chars, start, end):
+    """scan the lines of a doctest that begins on the start line.
+
+    like scan_code, the scan only reads the line arrays of the block state.
+    it returns the line after the doctest and the ends of its input and output."""
+    extra, output, closed = start + 1, start + 1, False
+    indent, next = sCount[start], start + 1
+    while next < end:
+        begin = bMarks[next] + tShift[next]
+        if begin >= eMarks[next]:
+            # an empty line ends the doctest
+            break
+        if sCount[next] < indent:
+            break
+        if chars[begin] == DOCTEST_CHAR and is_doctest(chars, begin, eMarks[next]):
+            break
+        next += 1
+        if (
+            (not closed)
+            and chars[begin] == ELLIPSIS_CHAR
+            and is_ellipsis(chars, begin, eMarks[next - 1])
+        ):
+            extra = next
+        else:
+            closed = True
+            output = next
+    return next, extra, output
+
+
+def is_doctest(chars, begin, end):
+    """test if a line begins with a doctest prompt.
+
+    the characters are compared one at a time so no tuple is sliced from the source.
+    the scans compare the first character before calling this for every line."""
+    return (
+        begin + 3 < end
+        and chars[begin] == DOCTEST_CHAR
+        and chars[begin + 1] == DOCTEST_CHAR
+        and chars[begin + 2] == DOCTEST_CHAR
+        and chars[begin + 3] == DOCTEST_SPACE
+    )
+
+
+def is_ellipsis(chars, begin, end):
+    """test if a line begins with a doctest continuation prompt, like is_doctest."""
+    return (
+        begin + 3 < end
+        and chars[begin] == ELLIPSIS_CHAR
+        and chars[begin + 1] == ELLIPSIS_CHAR
+        and chars[begin + 2] == ELLIPSIS_CHAR
+        and chars[begin + 3] == DOCTEST_SPACE
+    )
+
+
 def content_state(token):
-    left = token.content.rstrip()
-    continued = left.endswith("\\")
-    if continued:
-        left = left[:-1]
-    indented = left.endswith(":")
-    quoted = left.endswith(("'''", '"""'))
-    return dict(is_indented=indented, is_continued=continued, is_quoted=quoted)
+    content = token.content
+    # the end of the content is found by index rather than copying the block with rstrip
+    end = len(content)
+    while end and content[end - 1].isspace():
+        end -= 1
+    continued = content.endswith("\\", 0, end)
+    end -= continued
+    indented = content.endswith(":", 0, end)
+    quoted = content.endswith(("'''", '"""'), 0, end)
+    return {"is_indented": indented, "is_continued": continued, "is_quoted": quoted}
 
 
 def code_fence_lexer(state, *args, **kwargs):
@@ -113,20 +192,25 @@ def code_fence_lexer(state, *args, **kwargs):
     result = fence(state, *args, **kwargs)
     if result:
         token = state.tokens[-1]
-        first_indent, last_indent = None, 0
+        bMarks, eMarks, tShift, sCount = state.bMarks, state.eMarks, state.tShift, state.sCount
+        first_indent, last_indent, min_indent = None, 0, None
         extent = range(token.map[0] + 1, token.map[1] - 1)
+        # measure the indents of the fence body in a single pass over the lines
         for next in extent:
+            count = sCount[next]
             if next and first_indent is None:
-                first_indent = state.sCount[next]
+                first_indent = count
             if next < (extent.stop - 1):
-                last_indent = state.sCount[next]
-        min_indent = min([state.sCount[i] for i in extent if not state.isEmpty(i)] or [0])
+                last_indent = count
+            if bMarks[next] + tShift[next] < eMarks[next]:
+                if min_indent is None or count < min_indent:
+                    min_indent = count
         token.meta.update(
             first_indent=first_indent or 0,
             last_indent=last_indent,
-            min_indent=min_indent,
-            is_magic_info=bool(MAGIC.match(token.info)),
-            is_magic=bool(MAGIC.match(token.content)),
+            min_indent=min_indent or 0,
+            is_magic_info=bool(MAGIC(token.info)),
+            is_magic=bool(MAGIC(token.content)),
             is_doctest=token.info == PYCON,
             **content_state(token),
         )
@@ -1,11 +1,12 @@
 """run and import markdown files as python"""
 from dataclasses import dataclass, field
+from functools import lru_cache
 
 from types import MethodType, ModuleType
 from importnb import Notebook
 from importnb.loader import SourceModule
 
-from .python import Python
+from .language.python import Python
 
 __all__ = ("Markdown", "run")
 
@@ -32,13 +33,24 @@ class Markdown(Notebook):
     render_cls = Python
 
     def __post_init__(self):
-        self.renderer = self.render_cls(include_doctest=self.include_doctest)
+        self.renderer = get_renderer(self.render_cls, self.include_doctest)
 
     def exec_module(self, module):
         super().exec_module(module)
 
-    def code(self, str):
-        return super().code(self.renderer.render("".join(str)))
+    def code(self, source):
+        # importnb hands over the decoded source, joining a str would copy it a character at a time
+        if not isinstance(source, str):
+            source = "".join(source)
+        return super().code(self.renderer.render(source))
+
+
+@lru_cache(8)
+def get_renderer(cls, include_doctest=False):
+    """get a renderer shared by every loader with the same configuration.
+
+    a loader is created for each import so they share their renderers."""
+    return cls(doctest_code_blocks=include_doctest)
 
 
 if __name__ == "__main__":
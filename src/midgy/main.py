@@ -148,9 +148,6 @@ def run(*args):
 
     Tangle.from_argv(*args)
 
-import ast
+
 def runner(source):
-    module = compile(source, "", ast.PyCF_ONLY_AST)
-    for node in module.body:
-        co = compile(node, "", ast.Module([node], []))
-        eval(co)
+    exec(compile(source, "<midgy>", "exec"), {})
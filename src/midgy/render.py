@@ -1,20 +1,30 @@
 """render builds the machinery to translate markdown documents to code."""
 
 from dataclasses import dataclass, field
-from functools import partial
-from io import StringIO
-from re import compile
+
+from mdit_py_plugins import deflist, footnote
+
+from .front_matter import _front_matter_lexer, _shebang_lexer
+from .lexers import code_fence_lexer, code_lexer, doctest_lexer
+from .tangle import get_lines, get_token_method, read_line, take_lines
 
 __all__ = ()
 
 DOCTEST_CHAR, CONTINUATION_CHAR, COLON_CHAR, QUOTES_CHARS = 62, 92, 58, {39, 34}
 BLOCK, FENCE, PYCON = "code_block", "fence", "pycon"
 ESCAPE = {x: "\\" + x for x in "'\""}
-ESCAPE_PATTERN = compile("[" + "".join(ESCAPE) + "]")
-escape = partial(ESCAPE_PATTERN.sub, lambda m: ESCAPE.get(m.group(0)))
 SP, QUOTES = chr(32), (chr(34) * 3, chr(39) * 3)
 
 
+def escape(body):
+    """escape the quotes in a string. literal replacements avoid the regex engine."""
+    if "'" not in body and '"' not in body:
+        return body
+    for quote, escaped in ESCAPE.items():
+        body = body.replace(quote, escaped)
+    return body
+
+
 # the Renderer is special markdown renderer designed to produce
 # line for line transformations of markdown to the converted code.
 # not all languages require this, but for python it matters.
@@ -39,6 +49,10 @@ class Renderer:
     env: dict = None
     INDENT_TOKEN = ":"
     CONTINUE_TOKEN = "\\"
+    _token_methods = {}
+
+    def __init_subclass__(cls):
+        cls._token_methods = {}
 
     def __post_init__(self):
         self.parser = self.get_parser()
@@ -46,15 +60,26 @@ class Renderer:
     @classmethod
     def code_from_string(cls, body, **kwargs):
         """render a string"""
-        return cls(**kwargs).render(body)
+        return cls.get(**kwargs).render(body)
+
+    @classmethod
+    def get(cls, cached={}, **kwargs):
+        """get a renderer shared by calls with the same configuration.
+
+        building the markdown parser dominates the cost of rendering small documents
+        so renderers are reused. configurations that can't be hashed are not shared."""
+        key = cls, tuple(sorted(kwargs.items()))
+        try:
+            hash(key)
+        except TypeError:
+            return cls(**kwargs)
+        if key not in cached:
+            cached[key] = cls(**kwargs)
+        return cached[key]
 
     def get_block(self, env, stop=None):
         """iterate through the lines in a buffer"""
-        if stop is None:
-            yield from env["source"]
-        else:
-            while env["last_line"] < stop:
-                yield self.readline(env)
+        yield from take_lines(env, stop)
 
     def get_cells(self, tokens, *, env=None, include_hr=True):
         """walk cells separated by mega-hrs"""
@@ -62,11 +87,10 @@ class Renderer:
         for token in tokens:
             if token.type == "hr":
                 if (len(token.markup) - token.markup.count(" ")) > self.cell_hr_length:
-                    yield (list(block), token)
-                    block.clear()
-                    if include_hr:
-                        block.append(token)
-                    elif env is not None:
+                    # the finished block is handed off and a new one started rather than copied
+                    yield block, token
+                    block = [token] if include_hr else []
+                    if not include_hr and env is not None:
                         list(self.get_block(env, token))
             else:
                 block.append(token)
@@ -85,19 +109,32 @@ class Renderer:
                 return token.meta.setdefault("data", load(token.content))
             return
 
-    def get_initial_env(self, src, tokens):
+    def get_initial_env(self, src, tokens, lines=None):
         """initialize the parser environment indents"""
-        env = dict(**self.env or dict(), source=StringIO(src), last_line=0, last_indent=0)
+        if lines is None:
+            lines = get_lines(src)
+        env = dict(**self.env or dict(), lines=lines, last_line=0, last_indent=0)
         for token in filter(self.is_code_block, tokens):  # iterate through the tokens
             env["min_indent"] = min(env.get("min_indent", 9999), token.meta["min_indent"])
         env.setdefault("min_indent", 0)
         return env
 
-    def get_parser(self):
-        from markdown_it import MarkdownIt
+    def get_parser(self, cached={}):
+        """get the markdown parser for this kind of renderer.
+
+        the parser rules don't depend on the renderer configuration so one parser is built
+        for each class and shared by its instances."""
+        cls = type(self)
+        if cls not in cached:
+            from markdown_it import MarkdownIt
 
-        parser = MarkdownIt("gfm-like", options_update=dict(inline_definitions=True, langPrefix=""))
-        return self.set_parser_defaults(parser)
+            parser = MarkdownIt(
+                "gfm-like", options_update=dict(inline_definitions=True, langPrefix="")
+            )
+            cached[cls] = self.set_parser_defaults(parser)
+        return cached[cls]
+
+    get_token_method = classmethod(get_token_method)
 
     def get_updated_env(self, token, env, **kwargs):
         """update the state of the environment"""
@@ -136,13 +173,10 @@ class Renderer:
         yield from (x[0] for x in self.get_cells(self.parse(body), include_hr=include_hr))
 
     def print(self, iter, io):
-        return print(*iter, file=io, sep="", end="")
+        # writelines hands the parts to the buffer without print's argument and separator handling
+        return io.writelines(iter)
 
-    def readline(self, env):
-        try:
-            return env["source"].readline()
-        finally:
-            env["last_line"] += 1
+    readline = staticmethod(read_line)
 
     def render(self, src):
         return self.render_tokens(self.parse(src), src=src)
@@ -153,34 +187,41 @@ class Renderer:
         self = self.renderer_from_tokens(tokens)
         prior = self.get_initial_env(src, tokens)
         prior_token = None
-        source = prior.pop("source")
+        # the source is split once and the lines are shared by every cell
+        lines = prior.pop("lines")
 
         for block, next_token in self.get_cells(tokens, env=prior, include_hr=include_hr):
-            env = self.get_initial_env(src, block)
-            env["source"], env["last_line"] = source, prior["last_line"]
+            env = self.get_initial_env(src, block, lines)
+            env["last_line"] = prior["last_line"]
             prior_token and block.insert(0, prior_token)
             yield self.render_tokens(block, env=env, stop=next_token)
             prior, prior_token = env, next_token
 
     def render_token(self, token, env):
         if token:
-            method = getattr(self, token.type, None)
+            method = self.get_token_method(token.type)
             if method:
-                yield from method(token, env) or ()
+                yield from method(self, token, env) or ()
 
     def render_tokens(self, tokens, env=None, src=None, stop=None, target=None):
         """render parsed markdown tokens"""
-        if target is None:
-            target = StringIO()
         self = self.renderer_from_tokens(tokens)
         if env is None:
             env = self.get_initial_env(src, tokens)
+        # collect the rendered parts and join them once rather than growing a buffer
+        body = []
         for token in tokens:
             if self.is_code_block(token):
                 env["next_code"] = token
-            self.print(self.render_token(token, env), target)
+            method = self.get_token_method(token.type)
+            if method:
+                body.extend(method(self, token, env) or ())
         # handle anything left in the buffer
-        self.print(self.noncode(env, stop), target)
+        body.extend(self.noncode(env, stop))
+        body = "".join(body)
+        if target is None:
+            return body
+        target.write(body)
         return target.getvalue()  # return the value of the target, a format string.
 
     def renderer_from_tokens(self, tokens):
@@ -199,10 +240,6 @@ class Renderer:
         ## replace the indented code lexer to recognize doctests and append metadata.
         ## recognize shebang lines at the beginning of a document.
         ## recognize front-matter at the beginning of document of following shebangs
-        from mdit_py_plugins import deflist, footnote
-        from .front_matter import _front_matter_lexer, _shebang_lexer
-        from .lexers import code_fence_lexer, doctest_lexer, code_lexer
-
         parser.block.ruler.before("code", "doctest", doctest_lexer)
         parser.block.ruler.disable("code")
         # our indented code captures doctests in indented blocks
@@ -9,21 +9,29 @@ literate programming interface to many languages. in this approach, a project ca
 documentation-first, completely in markdown easing the codification of language. 
 """
 
-from dataclasses import dataclass
-from functools import partial
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from hashlib import blake2b
 from io import StringIO
 from re import compile
+from sys import intern
 import re
 
 import markdown_it
 import markdown_it.renderer
-import pygments
+from markdown_it.rules_core import StateCore, block, normalize
+from mdit_py_plugins import deflist, footnote
+
+# the parser rules and plugins are imported once with the module rather than for every parser
+from .front_matter import _front_matter_lexer, _shebang_lexer
+from .lexers import code_fence_lexer, code_lexer, doctest_lexer
 
 __all__ = ()
 
 DOCTEST_CHAR, CONTINUATION_CHAR, COLON_CHAR, QUOTES_CHARS = 62, 92, 58, {39, 34}
 BLOCK, FENCE, PYCON = "code_block", "fence", "pycon"
 SP, QUOTES = chr(32), (chr(34) * 3, chr(39) * 3)
+RENDER_CACHE_SIZE = 256
 
 
 class RendererHTML(markdown_it.renderer.RendererHTML):
@@ -35,6 +43,32 @@ class RendererHTML(markdown_it.renderer.RendererHTML):
         return string
 
 
+# the line buffer and token dispatch are shared by the tangles and the renderer
+def get_token_method(cls, type_):
+    """get the render method for a token type, they are looked up once for each class"""
+    try:
+        return cls._token_methods[type_]
+    except KeyError:
+        method = cls._token_methods[type_] = getattr(cls, type_, None)
+        return method
+
+
+def read_line(env):
+    """read the next line from the buffer, past the end the line is empty"""
+    lines, last = env["lines"], env["last_line"]
+    env["last_line"] = last + 1
+    return lines[last] if last < len(lines) else ""
+
+
+def take_lines(env, stop=None):
+    """read the lines up to stop from the buffer at once"""
+    lines, start = env["lines"], env["last_line"]
+    if stop is None:
+        stop = len(lines)
+    env["last_line"] = stop = max(stop, start)
+    return lines[start:stop]
+
+
 @dataclass
 class Tangle:
     _type = None
@@ -44,6 +78,9 @@ class Tangle:
     fenced_code_blocks: list | None = None
     noncode_blocks: bool = True
     env: dict = None
+    # the fenced languages are interned in a set when the tangle is made, fences test them often
+    _fenced_languages: frozenset = field(default=frozenset(), init=False, repr=False)
+    _token_methods = {}
 
     # constants
     COMMENT_MARKER = ""
@@ -51,6 +88,7 @@ class Tangle:
     MIN_INDENT: int = 4
 
     def __init_subclass__(cls, type=None, language=None):
+        cls._token_methods = {}
         if type:
             cls._mimetype = type
         if language:
@@ -58,24 +96,30 @@ class Tangle:
 
     def __post_init__(self):
         if self.parser is None:
-            self.parser = get_markdown_it()
-            self.initalize_parser_defaults(self.parser)
+            self.parser = self.get_parser()
 
         self.comment_prefix_line = isinstance(self.COMMENT_MARKER, str)
+        self._fenced_languages = frozenset(map(intern, self.fenced_code_blocks or ()))
 
     @staticmethod
-    def cls_from_lang(lang):
-        from importlib.metadata import entry_points
+    def cls_from_lang(lang, cached={}):
+        """load the tangle class registered for a language.
 
-        try:
-            return next(iter(entry_points(group="midgy", name=lang.lstrip(".")))).load()
-        except StopIteration:
-            return
+        scanning the installed entry points is slow so each language is loaded once.
+        missing languages are looked up again in case they are installed later."""
+        if lang not in cached:
+            from importlib.metadata import entry_points
+
+            try:
+                cached[lang] = next(iter(entry_points(group="midgy", name=lang.lstrip(".")))).load()
+            except StopIteration:
+                return
+        return cached[lang]
 
     def code_block(self, token, env):
         if self.indented_code_blocks:
             yield from self.generate_noncode(env, token)
-            block = self.generate_block_lines(env, token.map[1])
+            block = self.take_lines(env, token.map[1])
             yield from self.generate_code_block_body(block, token, env)
             self.update_env(token, env)
 
@@ -101,15 +145,11 @@ class Tangle:
 
     def generate_block_lines(self, env, stop=None):
         """iterate through the lines in a buffer"""
-        if stop is None:
-            yield from env["source"]
-        else:
-            while env["last_line"] < stop:
-                x = self.readline(env)
-                yield x
+        yield from self.take_lines(env, stop)
 
     def generate_code_block_body(self, block, token, env):
-        yield from self.generate_dedent_block(block, env["min_indent"])
+        # the block is dedented and joined at once, the output is written in chunks anyway
+        yield join_dedent_block(block, env["min_indent"])
 
     def generate_comment(self, block, token, env, *, prepend="", **kwargs):
         if self.comment_prefix_line:
@@ -127,7 +167,7 @@ class Tangle:
         return 0
 
     def generate_noncode(self, env, next=None):
-        block = self.generate_block_lines(env, next.map[0] if next else None)
+        block = self.take_lines(env, next.map[0] if next else None)
         if self.noncode_blocks:
             yield from self.generate_noncode_string(block, next, env)
         else:
@@ -137,47 +177,52 @@ class Tangle:
         yield from block
 
     def generate_tokens(self, tokens, env=None, src=None, stop=None, target=None):
+        # the rendered parts are written to the target as they are made
+        write = target.writelines
         for token in tokens:
             if self.is_code_block(token):
                 env["next_code"] = token
-            for line in self.render_token(token, env):
-                print(line, file=target, sep="", end="")
+            # most tokens have no method, they are skipped without a render_token generator
+            method = self.get_token_method(token.type)
+            if method:
+                write(method(self, token, env) or ())
 
         # handle anything left in the buffer
-        for line in self.generate_noncode(env, stop):
-            print(line, file=target, sep="", end="")
+        write(self.generate_noncode(env, stop))
 
     def generate_wrapped_lines(self, lines, lead="", pre="", trail="", continuation=""):
         """a utility function to manipulate a buffer of content line-by-line."""
-        # can do this better with buffers
-        whitespace, any, continued = StringIO(), False, False
+        if not (lead or pre or trail or continuation or self.CONTINUE_MARKER):
+            yield from self.generate_unwrapped_lines(lines)
+            return
+        # the whitespace between lines is kept in a list of lines rather than a text buffer
+        whitespace, any, continued = [], False, False
+        marker = self.CONTINUE_MARKER
         for line in lines:
             length = len(line.rstrip())
             if length:
                 if any:
-                    yield whitespace.getvalue()
+                    yield "".join(whitespace)
                 else:
-                    for i, l in enumerate(whitespace):
+                    for l in whitespace:
                         yield from (continuation, l[-1])
-                if self.CONTINUE_MARKER:
-                    continued = line[length - 1] == self.CONTINUE_MARKER
+                if marker:
+                    continued = line[length - 1] == marker
                     if continued:
                         length -= 2  # cause of the escape?
                 yield pre
                 yield lead
                 yield line[:length]
-                lead, any, whitespace = "", True, StringIO(line[length:])
+                lead, any, whitespace = "", True, [line[length:]]
             else:
-                whitespace.write(line)
+                whitespace.append(line)
         if any:
             yield trail
-        if any:
-            whitespace.seek(0)
             if continued:
                 for i, line in enumerate(whitespace):
                     yield pre * bool(i)
                     yield line[0 if i else 2 : -1]
-                    yield self.CONTINUE_MARKER
+                    yield marker
                     yield line[-1]
             else:
                 for i, line in enumerate(whitespace):
@@ -185,14 +230,34 @@ class Tangle:
         else:
             yield from map((continuation or "").__add__, whitespace)
 
-    def initialize_env(self, src, tokens):
+    def generate_unwrapped_lines(self, lines):
+        """the identity case of generate_wrapped_lines when there is nothing to wrap the lines with.
+
+        the lines pass through untouched once content is found, only the blank lines before it
+        are trimmed to their line endings."""
+        lines, whitespace = iter(lines), []
+        for line in lines:
+            if line.strip():
+                for l in whitespace:
+                    yield l[-1]
+                yield line
+                yield from lines
+                return
+            whitespace.append(line)
+        yield from whitespace
+
+    def initialize_env(self, src, tokens, min_indent=None):
         """initialize the parser environment indents"""
-        env = dict(**self.env or dict(), source=StringIO(src), last_line=0, last_indent=0)
-        for token in filter(self.is_code_block, tokens):  # iterate through the tokens
-            if not token.meta.get("is_magic"):
-                env["min_indent"] = min(env.get("min_indent", 9999), token.meta["min_indent"])
+        env = {**(self.env or {}), "lines": get_lines(src), "last_line": 0, "last_indent": 0}
+        if min_indent is None:
+            for token in filter(self.is_code_block, tokens):  # iterate through the tokens
+                if not token.meta.get("is_magic"):
+                    env["min_indent"] = min(env.get("min_indent", 9999), token.meta["min_indent"])
+        else:
+            # the indent was measured when the tokens were parsed
+            env["min_indent"] = min(env.get("min_indent", min_indent), min_indent)
         env.setdefault("min_indent", 0)
-        env.setdefault("whitespace", StringIO())
+        env.setdefault("whitespace", [])
         return env
 
     def initialize_parser(self):
@@ -204,10 +269,9 @@ class Tangle:
         ## replace the indented code lexer to recognize doctests and append metadata.
         ## recognize shebang lines at the beginning of a document.
         ## recognize front-matter at the beginning of document of following shebangs
-        from mdit_py_plugins import deflist, footnote
-        from .front_matter import _front_matter_lexer, _shebang_lexer
-        from .lexers import code_fence_lexer, doctest_lexer, code_lexer
-
+        if getattr(parser, "midgy_initialized", False):
+            # the rules are only installed once, parsers are shared by the instances of a class
+            return parser
         parser.block.ruler.before("code", "doctest", doctest_lexer)
         parser.block.ruler.disable("code")
         # our indented code captures doctests in indented blocks
@@ -220,15 +284,20 @@ class Tangle:
         parser.block.ruler.before("table", "front_matter", _front_matter_lexer)
         parser.use(footnote.footnote_plugin).use(deflist.deflist_plugin)
         parser.disable("footnote_tail")
-        parser.code_formatter = pygments.formatters.get_formatter_by_name("html", noclasses=True)
+        parser.code_formatter = get_code_formatter()
         parser.options["highlight"] = self.highlight
+        parser.midgy_initialized = True
         return parser
 
     def highlight(self, source, lang, attrs):
+        # pygments is only imported when a code fence is highlighted, not when midgy is imported
+        from pygments import highlight
+        from pygments.lexers import get_lexer_by_name
+
         try:
-            return pygments.highlight(
+            return highlight(
                 source,
-                pygments.lexers.get_lexer_by_name(lang),
+                get_lexer_by_name(lang),
                 self.parser.code_formatter,
             )
         except:
@@ -239,27 +308,81 @@ class Tangle:
         if self.indented_code_blocks and token.type == BLOCK:
             return self.indented_code_blocks
         elif token.type == FENCE:
-            tokens = (token.info or "%").split(maxsplit=1) or [""]
-            return tokens[0] in (self.fenced_code_blocks or ())
+            return get_info_lang(token.info or "%") in self._fenced_languages
         return False
 
     def parse(self, src, env=None):
         return self.parser.parse(src, env)
 
-    def readline(self, env):
-        try:
-            return env["source"].readline()
-        finally:
-            env["last_line"] += 1
+    def parse_measured(self, src, env=None):
+        """parse a source and measure the least indent of its code blocks.
+
+        tangles that measure the indent while parsing return it, otherwise it is None and
+        initialize_env measures the code blocks itself."""
+        return self.parse(src, env), None
+
+    def parse_blocks(self, src, env=None):
+        """parse only the block tokens of the source.
+
+        tangling reads the lines spanned by block tokens so the core inline rules are skipped."""
+        state = StateCore(src, self.parser, {} if env is None else env)
+        normalize(state)
+        block(state)
+        return state.tokens
 
-    def render(self, src):
-        return self.render_tokens(self.parse(src), src=src)
+    def parse_inline(self, tokens, env=None):
+        """parse the inline tokens that were skipped by parse_blocks"""
+        # the core rules run over the block tokens. the source is empty so the block rule adds
+        # nothing while the inline and linkify rules fill in the children of the inline tokens.
+        self.parser.core.process(StateCore("", self.parser, {} if env is None else env, tokens))
+        return tokens
+
+    readline = staticmethod(read_line)
+
+    def render(self, src, target=None):
+        """render markdown source as code.
+
+        renderings without a target are shared by tangles with the same configuration
+        so rendering an unchanged source again is a lookup."""
+        if target is None:
+            return get_rendering(self, src, partial(self.render_source, src))
+        return self.render_source(src, target)
+
+    def render_source(self, src, target=None):
+        """parse and render a source.
+
+        parsing can measure the code blocks, the render env reuses the measure
+        rather than walking the tokens again."""
+        tokens, min_indent = self.parse_measured(src)
+        env = self.initialize_env(src, tokens, min_indent)
+        return self.render_tokens(tokens, env, src, target=target)
+
+    def get_render_key(self):
+        """a hashable key of the configuration a rendering depends on"""
+        # the parser is part of the key, instances share their class parser unless one is given
+        key = [type(self)]
+        for name in self.__dataclass_fields__:
+            value = getattr(self, name)
+            key.append(frozenset(value) if isinstance(value, (set, list)) else value)
+        return tuple(key)
+
+    def get_parser(self, cached={}):
+        """get the markdown parser configured for this kind of tangle.
+
+        the conventions are installed once on a parser for each class, configuring a shared
+        parser for every instance would add the rules to it over and over."""
+        cls = type(self)
+        if cls not in cached:
+            cached[cls] = self.initalize_parser_defaults(get_markdown_it(False))
+        return cached[cls]
+
+    get_token_method = classmethod(get_token_method)
 
     def render_token(self, token, env):
         if token:
-            method = getattr(self, token.type, None)
+            method = self.get_token_method(token.type)
             if method:
-                yield from method(token, env) or ()
+                yield from method(self, token, env) or ()
 
     def render_tokens(self, tokens, env=None, src=None, stop=None, target=None):
         """render parsed markdown tokens"""
@@ -274,7 +397,9 @@ class Tangle:
         return target.getvalue()  # return the value of the target, a format string.
 
     def shebang(self, token, env):
-        yield from self.generate_block_lines(env, token.map[1])
+        yield from self.take_lines(env, token.map[1])
+
+    take_lines = staticmethod(take_lines)
 
     def update_env(self, token, env, **kwargs):
         """update the state of the environment"""
@@ -296,10 +421,70 @@ def get_markdown_it(cache=True, cached={}):
             renderer_cls=RendererHTML,
         )
     if not cached:
-        cached["cache"] = get_markdown_it(False)
+        # callers that are not tangles share the parser configured for markdown tangles
+        cached["cache"] = Markdown().parser
     return cached["cache"]
 
 
+def join_dedent_block(block, dedent):
+    """join the lines of a code block removing the dedent from each line."""
+    if dedent:
+        # a list comprehension is joined faster than a generator, join would build the list anyway
+        return "".join([line[dedent:] if len(line) > 1 else line for line in block])
+    # most code is not indented in the document so the lines are joined as they are
+    return "".join(block)
+
+
+def get_code_formatter(cached={}):
+    """get the html formatter for highlighting code.
+
+    the formatter builds a stylesheet when it is created so one is shared by every parser."""
+    if not cached:
+        from pygments.formatters import get_formatter_by_name
+
+        cached["html"] = get_formatter_by_name("html", noclasses=True)
+    return cached["html"]
+
+
+def get_digest(src):
+    """a short digest that identifies a source, it is cheap next to parsing the source"""
+    return blake2b(src.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+
+
+def get_rendering(tangle, src, render, cached={}):
+    """get the rendering of a source shared by tangles with the same configuration.
+
+    renderings are keyed by the render key of the tangle and a digest of the source so
+    the cache does not hold on to the documents it has seen. the least recently used
+    rendering is forgotten first. configurations that can't be hashed are rendered every time."""
+    try:
+        key = tangle.get_render_key(), get_digest(src)
+        value = cached.pop(key, None)
+    except TypeError:
+        return render()
+    if value is None:
+        if len(cached) >= RENDER_CACHE_SIZE:
+            del cached[next(iter(cached))]
+        value = render()
+    cached[key] = value
+    return value
+
+
+@lru_cache(256)
+def get_info_lang(info):
+    """the language of a fence info string.
+
+    documents repeat the same few fence infos so each one is split and interned once
+    for both the fence dispatch and its fence method."""
+    lang = info.split(maxsplit=1)
+    return lang and intern(lang[0]) or ""
+
+
+def get_lines(src):
+    """split the source into lines the same way markdown-it counts them, only on newlines."""
+    return StringIO(src).readlines()
+
+
 class Tangled(str):
     def _ipython_display_(self):
         print(self)
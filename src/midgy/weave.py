@@ -1,23 +1,35 @@
 from dataclasses import dataclass, field
 from doctest import DocTestFinder, DocTestRunner
+from functools import lru_cache, partial
 from importlib import import_module
 from shlex import split
 from typing import Any
-from .tangle import Tangle
+from .tangle import Tangle, get_rendering
 from ._argparser import parser
 
 
-def get_environment():
-    from ._magics import get_environment
-    from IPython import get_ipython
+def get_environment(shell=None):
+    """get the jinja environment of the shell.
 
-    shell = get_ipython()
-    if shell.has_trait("environment"):
+    weave passes the shell it already has so the shell is not looked up for every cell."""
+    if shell is None:
+        from IPython import get_ipython
+
+        shell = get_ipython()
+    if shell is not None and shell.has_trait("environment"):
         return shell.environment
+    return get_default_environment()
+
+
+@lru_cache(1)
+def get_default_environment():
+    """an environment shared by weaves outside of a shell with a jinja environment"""
+    from ._magics import get_environment
+
     return get_environment()
 
 
-@dataclass
+@dataclass(slots=True)
 class Weave:
     source: str = None
     parser: Tangle = None
@@ -57,19 +69,25 @@ def weave(
         parser = shell.tangle.parser
         env = shell._markdown_env
     else:
-        parser = Tangle.cls_from_lang(language or "python")(**kwargs)
+        parser = get_tangle(language or "python", **kwargs)
     if unsafe:
-        cmd = shell.environment.from_string(cmd).render()
+        cmd = get_template(shell.environment, cmd).render()
     if name is not None:
         # allow exposing the source code as a named variable
         # this is a great optional feature for debugging or reusing code.
-        get_ipython().user_ns[name] = cmd
-    self = Weave(source=cmd, parser=parser, env=env)
+        shell.user_ns[name] = cmd
+    self = Weave(source=cmd, parser=parser, env=env, environment=get_environment(shell))
     self.tokens = self.parser.parse(self.source, self.env)
+    render = partial(self.parser.render_tokens, self.tokens, src=self.source)
+    if self.env:
+        # the reference definitions of earlier cells can make links in a document of paragraphs,
+        # renderings made with the shell env are not shared with Tangle.render
+        out = render()
+    else:
+        # cells are often woven again unchanged so their code is shared with Tangle.render
+        out = get_rendering(self.parser, self.source, render)
     if tokens:
         print(self.tokens)
-    self.env = self.parser.initialize_env(self.source, self.tokens)
-    out = self.parser.render_tokens(self.tokens, self.env, self.source)
     if format:
         out = blacken(out)
     self.out = Block(out)
@@ -89,24 +107,51 @@ def weave(
         from IPython.display import display
 
         if weave and self.tokens[0].map[0] == int(magic):
+            # the template is compiled and rendered once for either display
+            source = get_template(self.environment, self.source).render()
             if html:
-                output = self.parser.parser.render(
-                    self.environment.from_string(self.source).render(), env
-                ).rstrip()
+                output = self.parser.parser.render(source, env).rstrip()
                 while output.endswith("< />"):
                     output = output.removesuffix("< />")
                 data.update({"text/html": output})
                 if env:
                     env.pop("duplicate_refs", None)
             else:
-                data.update({"text/markdown": self.environment.from_string(self.source).render()})
+                data.update({"text/markdown": source})
         display(data, raw=True)
 
 
+def get_tangle(language, cached={}, **kwargs):
+    """get a tangle for a language shared by weaves with the same configuration.
+
+    tangles keep their configuration and parse into a separate env so they can be reused.
+    configurations that can't be hashed are not shared."""
+    key = language, tuple(sorted(kwargs.items()))
+    try:
+        hash(key)
+    except TypeError:
+        return Tangle.cls_from_lang(language)(**kwargs)
+    if key not in cached:
+        cached[key] = Tangle.cls_from_lang(language)(**kwargs)
+    return cached[key]
+
+
+@lru_cache(64)
+def get_template(environment, source):
+    """compile a template from a string, cells that are run again reuse their template"""
+    return environment.from_string(source)
+
+
 def blacken(string):
-    import black
+    return get_black_formatter()(string)
+
+
+@lru_cache(1)
+def get_black_formatter():
+    """black is imported the first time formatting is asked for and its mode is built once"""
+    from black import FileMode, format_str
 
-    return black.format_str(string, mode=black.FileMode())
+    return partial(format_str, mode=FileMode())
 
 
 def quick_doctest(source, name="__main__"):
@@ -137,4 +182,6 @@ def weave_argv(argv, magic=False):
 
 
 class Block(str):
+    # a block is made for every weave, slots keep it the size of the string
+    __slots__ = ()
     __repr__ = str.__str__
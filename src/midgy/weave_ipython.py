@@ -1,8 +1,9 @@
-from dataclasses import field
-from shlex import split
-from numpy import isin
-from .tangle import BLOCK, Tangle
+from dataclasses import dataclass, field
+from .tangle import Tangle
 from ._argparser import parser
+
+
+@dataclass(slots=True)
 class Weave:
     source: str = None
     parser: Tangle = None
@@ -25,7 +26,7 @@ def weave(cmd=None, file=None, module=None, run=True, display=False, language="p
     return self.out
 
 def weave_argv(argv):
-    ns, extra = parser.parse_known_args(ns)
+    ns, extra = parser.parse_known_args(argv)
     return weave(**vars(ns), extra=extra)
 
 